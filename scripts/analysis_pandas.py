@@ -8,9 +8,9 @@
 import os
 import re
 import pandas as pd
-import matplotlib.pyplot as plt
 from typing import Optional, Dict, List
 from sqlalchemy import create_engine
+from charts import major_group_avg_chart, render_charts, state_comparison_charts, top_n_soc_chart
 
 
 # ========= Set up Postgres connection =========
@@ -25,7 +25,7 @@ if not PG_URI:
     #   1) Reads the view with pandas.read_sql (via SQLAlchemy engine).
     #   2) Aggregates average wage by SOC major group (first two digits).
     #   3) Finds Top-10 O*NET SOC codes by annual mean wage.
-    #   4) Plots both results with Matplotlib and saves PNGs.
+    #   4) Plots both results (charts.py; headless Matplotlib) and saves PNGs.
     #   5) Provides a brief textual interpretation of findings.
     
     # Function Parameters
@@ -37,7 +37,7 @@ if not PG_URI:
     # save_dir : str, optional
     #     If provided, save CSVs and PNG charts in this directory.
     # show_plots : bool
-    #     If True, display charts interactively (useful in notebooks).
+    #     Kept for compatibility. Charts are rendered headless (Agg) and saved as PNGs only.
     
     # Output
     # -------
@@ -142,30 +142,13 @@ def analyze_onet_oews_view(
         top10_soc.to_csv(top_path, index=False)
 
         # Charts (simple defaults; no custom colors per your style guidelines)
-        plt.figure()
-        plt.bar(avg_wage_by_major["soc_major_group"].astype(str),
-                avg_wage_by_major["avg_annual_mean_wage"])
-        plt.title("Average Annual Mean Wage by SOC Major Group")
-        plt.xlabel("SOC Major Group (first two digits)")
-        plt.ylabel("Average Annual Mean Wage")
-        plt.tight_layout()
-        plt_path1 = os.path.join(save_dir, "avg_wage_by_major_group.png")
-        plt.savefig(plt_path1)
-        if show_plots: plt.show()
-        plt.close()
-
-        plt.figure()
-        # For readability on x-axis, use short labels
-        plt.bar(top10_soc[soc_col].astype(str), top10_soc["avg_annual_mean_wage"])
-        plt.title("Top-10 O*NET SOC Codes by Annual Mean Wage (average)")
-        plt.xlabel("O*NET SOC Code")
-        plt.ylabel("Average Annual Mean Wage")
-        plt.xticks(rotation=45, ha="right")
-        plt.tight_layout()
-        plt_path2 = os.path.join(save_dir, "top10_soc_by_wage.png")
-        plt.savefig(plt_path2)
-        if show_plots: plt.show()
-        plt.close()
+        # Rendered headless (Agg) in a process pool; unchanged charts are skipped.
+        render_charts([
+            major_group_avg_chart(avg_wage_by_major, save_dir),
+            top_n_soc_chart(top10_soc, soc_col, save_dir, n=10),
+        ])
+        if show_plots:
+            print("⚠️ Warning: charts are rendered headless; open the saved PNGs instead of show_plots.")
 
         print(f"Saved CSVs to: {save_dir}")
         print(f"Saved charts to: {save_dir}")
@@ -205,19 +188,66 @@ def analyze_onet_oews_view(
 
 
 
+# ======== Per-state comparison charts =========
+    # What it does:
+    #   1) Reads the columns needed from curated.vw_oews_state_vs_weighted.
+    #   2) Builds one chart per state: state annual mean wage vs the employment-weighted average
+    #      across all states, for the state's top-N occupations by employment.
+    #   3) Renders the charts in a process pool; charts whose data has not changed are skipped.
+    #
+    # Output
+    # -------
+    # dict[str, bool]: PNG path -> True if rendered, False if skipped as unchanged.
+
+def chart_state_vs_weighted(
+    pg_uri: str,
+    save_dir: str,
+    view_name: str = "curated.vw_oews_state_vs_weighted",
+    *,
+    top_n: int = 15,
+    states: Optional[List[str]] = None,
+    max_workers: Optional[int] = None
+) -> Dict[str, bool]:
+    engine = create_engine(pg_uri)
+    sql = (
+        "SELECT occ_code, prim_state, state_tot_emp, state_a_mean, weighted_annual_mean_wage "
+        f"FROM {view_name};"
+    )
+    df = pd.read_sql(sql, engine)
+
+    # sanity check: ensure data exists
+    if df.empty:
+        raise ValueError(
+            f"No rows returned from {view_name}. "
+            "Confirm the view exists and your connection has access."
+        )
+
+    specs = state_comparison_charts(df, os.path.join(save_dir, "state_vs_weighted"), top_n=top_n, states=states)
+    rendered = render_charts(specs, max_workers=max_workers)
+    print(
+        f"Rendered {sum(rendered.values())} of {len(rendered)} state charts "
+        f"({len(rendered) - sum(rendered.values())} unchanged) to: {save_dir}"
+    )
+    return rendered
+
+
 # ============= Call the above function ==============
 # This section describes how to call the function above.
 # Uncomment and modify the following lines as needed.
+# Note: the __main__ guard is required because charts are rendered in worker processes.
 # ===========================================================
 
-results = analyze_onet_oews_view(
-    pg_uri=PG_URI,
-    view_name="curated.vw_onet_closest_oews",
-    save_dir="data_output/curated",
-    show_plots=False
-) 
+if __name__ == "__main__":
+    results = analyze_onet_oews_view(
+        pg_uri=PG_URI,
+        view_name="curated.vw_onet_closest_oews",
+        save_dir="data_output/curated",
+        show_plots=False
+    ) 
+
+    # chart_state_vs_weighted(pg_uri=PG_URI, save_dir="data_output/curated")
 
 # -------- Access the dataframes if you need them later --------
 # avg_by_group = results["avg_wage_by_major_group"]
 # top10 = results["top10_soc_by_wage"]
-# print(top10)
\ No newline at end of file
+# print(top10)
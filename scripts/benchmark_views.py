@@ -0,0 +1,397 @@
+# ================================================================
+# Description: SQL view performance regression harness.
+# This script:
+#   1) Seeds a local (benchmark-only) Postgres DB with synthetic OEWS/O*NET data at a chosen scale.
+#   2) Creates the curated views from queries/*.sql.
+#   3) Runs each view under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) and captures
+#      execution time, buffer hits/reads and the plan shape.
+#   4) Compares the numbers to a stored baseline and flags regressions.
+# Use it to judge view rewrites and index changes on numbers rather than guesswork.
+#
+# Usage (from the repo root):
+#   BENCH_PG_URI=postgresql://<user>:<password>@localhost:5432/arena_bench_db \
+#       python scripts/benchmark_views.py --scale 4
+#   ... --update-baseline    # store the current numbers as the new baseline
+#
+# IMPORTANT: seeding DROPS and re-creates raw.onet_skills_raw and curated.oews_cleaned.
+# Point BENCH_PG_URI at a throwaway database, never at the pipeline DB (PG_URI).
+# ================================================================
+
+# ========= Import Lbraries and Dependencies =========
+from __future__ import annotations
+
+import argparse                        # command line options (scale, runs, baseline update)
+import glob                            # finding the view definitions in queries/*.sql
+import json                            # reading/writing the baseline and EXPLAIN JSON output
+import os                              # environment variables and file paths
+import re                              # extracting view names from the SQL files
+import statistics                      # median of repeated runs
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+
+QUERIES_DIR = "queries"
+BASELINE_PATH = os.path.join(QUERIES_DIR, "benchmarks", "view_plan_baseline.json")
+RESULTS_DIR = "data_output/benchmarks"
+
+# ---- base sizes at scale 1 (roughly the size of the real 2024 extracts) ----
+BASE_OCCUPATIONS = 800        # distinct 6-digit OEWS occ_codes
+STATES = 54                   # states + DC + territories in the OEWS by State file
+ONET_CHILDREN_PER_OCC = 2     # O*NET child codes per 6-digit prefix ('.00', '.01', ...)
+SKILLS_PER_CHILD = 35         # O*NET Skills file has 35 skill elements per code
+
+
+# ========= 1) Seed scaled synthetic data =========
+# The tables mirror the columns written by load_data.py (raw) and data_prep.py (curated),
+# including the lowercase values (e.g. prim_state = 'md', scale_id = 'im') the views filter on.
+# setseed() makes random() repeatable, so every seeding at a scale gives the same data as its baseline.
+SEED_SQL = """
+SELECT setseed(0.5);
+
+CREATE SCHEMA IF NOT EXISTS raw;
+CREATE SCHEMA IF NOT EXISTS curated;
+
+DROP TABLE IF EXISTS curated.oews_cleaned CASCADE;
+DROP TABLE IF EXISTS raw.onet_skills_raw CASCADE;
+
+CREATE TABLE curated.oews_cleaned AS
+WITH occ AS (
+  SELECT
+    i,
+    lpad((11 + i % 43)::text, 2, '0') || '-' || lpad((i / 43)::text, 4, '0') AS occ_code
+  FROM generate_series(0, :occupations - 1) AS i
+),
+states AS (
+  SELECT
+    s,
+    CASE WHEN s = 0 THEN 'md' ELSE chr(97 + (s / 26) % 26) || chr(97 + s % 26) END AS prim_state
+  FROM generate_series(0, :states - 1) AS s
+)
+SELECT
+  occ.occ_code,
+  'occupation ' || occ.i                               AS occ_title,
+  states.prim_state,
+  (50 + random() * 5000)::double precision             AS tot_emp,
+  (random() * 20)::double precision                    AS jobs_1000,
+  (random() * 10)::double precision                    AS mean_prse,
+  (random() * 10)::double precision                    AS emp_prse,
+  w.a_mean                                             AS a_mean,
+  w.a_mean * 0.95                                      AS a_median,
+  w.a_mean * 0.60                                      AS a_pct10,
+  w.a_mean * 0.80                                      AS a_pct25,
+  w.a_mean * 1.20                                      AS a_pct75,
+  w.a_mean * 1.50                                      AS a_pct90,
+  w.a_mean / 2080                                      AS h_mean,
+  w.a_mean * 0.95 / 2080                               AS h_median,
+  w.a_mean * 0.60 / 2080                               AS h_pct10,
+  w.a_mean * 0.80 / 2080                               AS h_pct25,
+  w.a_mean * 1.20 / 2080                               AS h_pct75,
+  w.a_mean * 1.50 / 2080                               AS h_pct90,
+  'true'                                               AS annual,
+  CASE WHEN occ.i % 5 = 0 THEN 'true' ELSE 'false' END AS hourly,
+  (random() * 100)::double precision                   AS pct_total,
+  (random() * 100)::double precision                   AS pct_rpt
+FROM occ
+CROSS JOIN states
+CROSS JOIN LATERAL (SELECT (25000 + random() * 150000)::double precision AS a_mean) w;
+
+CREATE TABLE raw.onet_skills_raw AS
+WITH occ AS (
+  SELECT
+    i,
+    lpad((11 + i % 43)::text, 2, '0') || '-' || lpad((i / 43)::text, 4, '0') AS occ_code
+  FROM generate_series(0, :occupations - 1) AS i
+)
+SELECT
+  occ.occ_code || '.' || lpad(c::text, 2, '0')          AS onet_soc_code,
+  'occupation ' || occ.i || ' child ' || c              AS title,
+  '2.a.' || k                                           AS element_id,
+  'skill ' || k                                         AS element_name,
+  sc.scale_id,
+  (random() * 7)::double precision                      AS data_value
+FROM occ
+CROSS JOIN generate_series(0, :children - 1) AS c
+CROSS JOIN generate_series(1, :skills) AS k
+CROSS JOIN (VALUES ('im'), ('lv')) AS sc(scale_id);
+
+ANALYZE curated.oews_cleaned;
+ANALYZE raw.onet_skills_raw;
+"""
+
+
+def seed_scaled_data(engine: Engine, scale: float) -> Dict[str, int]:
+    """
+    Drop and re-create the source tables of the views with synthetic data.
+
+    Parameters
+    ----------
+    engine : Engine
+        SQLAlchemy engine of the benchmark database.
+    scale : float
+        Multiplier applied to the number of occupations (rows grow linearly with it).
+
+    Returns
+    -------
+    dict[str, int]
+        Row counts of the seeded tables.
+    """
+    params = {
+        "occupations": max(1, int(BASE_OCCUPATIONS * scale)),
+        "states": STATES,
+        "children": ONET_CHILDREN_PER_OCC,
+        "skills": SKILLS_PER_CHILD,
+    }
+    with engine.begin() as conn:
+        for statement in [s.strip() for s in SEED_SQL.split(";") if s.strip()]:
+            conn.execute(text(statement), params)
+
+        return {
+            "curated.oews_cleaned": conn.execute(text("SELECT count(*) FROM curated.oews_cleaned")).scalar_one(),
+            "raw.onet_skills_raw": conn.execute(text("SELECT count(*) FROM raw.onet_skills_raw")).scalar_one(),
+        }
+
+
+# ========= 2) Create the views from queries/*.sql =========
+# ----- This function returns {view_name: sql} for every view definition in the queries directory -----
+def load_view_definitions(queries_dir: str = QUERIES_DIR) -> Dict[str, str]:
+    views = {}
+    for path in sorted(glob.glob(os.path.join(queries_dir, "*.sql"))):
+        with open(path, encoding="utf-8") as f:
+            sql = f.read()
+        m = re.search(r"CREATE\s+OR\s+REPLACE\s+VIEW\s+([\w.]+)\s+AS", sql, flags=re.IGNORECASE)
+        if not m:
+            print(f"⚠️ Warning: No view definition found in '{path}'. Skipping.")
+            continue
+        views[m.group(1)] = sql
+    return views
+
+
+def create_views(engine: Engine, views: Dict[str, str]) -> None:
+    with engine.begin() as conn:
+        for view_name, sql in views.items():
+            # CREATE OR REPLACE cannot remove, rename or reorder output columns; drop first so rewrites apply
+            conn.exec_driver_sql(f"DROP VIEW IF EXISTS {view_name} CASCADE")
+            conn.exec_driver_sql(sql)
+
+
+# ========= 3) Run EXPLAIN (ANALYZE, BUFFERS) and capture the numbers =========
+# ----- This function turns a plan tree into a compact shape string -----
+# e.g. "Sort(Hash Join[Left](Seq Scan, Hash(Seq Scan)))". Costs and row counts are left out on purpose,
+# so the shape only changes when the planner picks a different strategy.
+def plan_shape(node: dict) -> str:
+    label = node["Node Type"]
+    if node.get("Join Type"):
+        label += f"[{node['Join Type']}]"
+    if node.get("Strategy"):
+        label += f"[{node['Strategy']}]"
+    children = node.get("Plans", [])
+    if children:
+        label += "(" + ", ".join(plan_shape(child) for child in children) + ")"
+    return label
+
+
+def explain_view(engine: Engine, view_name: str, runs: int = 3) -> dict:
+    """
+    Run a view under EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON).
+
+    One warm-up run is discarded, then 'runs' runs are timed. The reported execution and planning
+    times are medians; buffer counts and the plan come from the last run.
+
+    Returns
+    -------
+    dict
+        execution_ms, planning_ms, shared_hit_blocks, shared_read_blocks, temp_written_blocks,
+        rows, plan_shape and the full JSON plan.
+    """
+    sql = f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT * FROM {view_name}"
+    explained = []
+    with engine.connect() as conn:
+        for _ in range(runs + 1):
+            result = conn.exec_driver_sql(sql).scalar_one()
+            # psycopg2 decodes the json column; other drivers may return a string
+            explained.append((json.loads(result) if isinstance(result, str) else result)[0])
+    explained = explained[1:]
+
+    last = explained[-1]
+    root = last["Plan"]
+    return {
+        "execution_ms": round(statistics.median(e["Execution Time"] for e in explained), 3),
+        "planning_ms": round(statistics.median(e["Planning Time"] for e in explained), 3),
+        "shared_hit_blocks": root.get("Shared Hit Blocks", 0),
+        "shared_read_blocks": root.get("Shared Read Blocks", 0),
+        "temp_written_blocks": root.get("Temp Written Blocks", 0),
+        "rows": root.get("Actual Rows", 0),
+        "plan_shape": plan_shape(root),
+        "plan": last,
+    }
+
+
+# ========= 4) Compare against the stored baseline =========
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(baseline: dict, path: str = BASELINE_PATH) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare_to_baseline(
+    current: dict,
+    baseline: Optional[dict],
+    time_tolerance: float = 0.25,
+    buffer_tolerance: float = 0.10,
+    min_time_delta_ms: float = 5.0
+) -> List[str]:
+    """
+    Compare one view's numbers to its baseline entry.
+
+    Parameters
+    ----------
+    current : dict
+        Output of 'explain_view' (without the full plan is fine).
+    baseline : dict, optional
+        Stored numbers for the same view and scale. If None, nothing is flagged.
+    time_tolerance : float
+        Allowed relative increase of the execution time (0.25 = +25%).
+    buffer_tolerance : float
+        Allowed relative increase of the total buffers touched (hits + reads).
+    min_time_delta_ms : float
+        Execution time increases smaller than this are treated as noise.
+
+    Returns
+    -------
+    list of str
+        Human-readable regression flags; empty when the view is within tolerance.
+    """
+    if not baseline:
+        return []
+
+    flags = []
+    base_ms, cur_ms = baseline["execution_ms"], current["execution_ms"]
+    if cur_ms > base_ms * (1 + time_tolerance) and cur_ms - base_ms > min_time_delta_ms:
+        flags.append(f"execution time {base_ms:,.1f} ms -> {cur_ms:,.1f} ms (+{(cur_ms / base_ms - 1):.0%})")
+
+    base_buffers = baseline["shared_hit_blocks"] + baseline["shared_read_blocks"]
+    cur_buffers = current["shared_hit_blocks"] + current["shared_read_blocks"]
+    if base_buffers and cur_buffers > base_buffers * (1 + buffer_tolerance):
+        flags.append(f"buffers {base_buffers:,} -> {cur_buffers:,} (+{(cur_buffers / base_buffers - 1):.0%})")
+
+    if current["temp_written_blocks"] > baseline.get("temp_written_blocks", 0):
+        flags.append(
+            f"temp blocks written {baseline.get('temp_written_blocks', 0):,} -> {current['temp_written_blocks']:,} "
+            "(sort/hash spilled to disk)"
+        )
+
+    if current["plan_shape"] != baseline["plan_shape"]:
+        flags.append(f"plan shape changed:\n      was: {baseline['plan_shape']}\n      now: {current['plan_shape']}")
+
+    return flags
+
+
+# ========= Run the harness =========
+def run_benchmark(
+    bench_pg_uri: str,
+    scale: float = 1.0,
+    runs: int = 3,
+    update_baseline: bool = False,
+    skip_seed: bool = False,
+    time_tolerance: float = 0.25,
+    buffer_tolerance: float = 0.10
+) -> bool:
+    """
+    Seed, create the views, EXPLAIN each view and compare against the baseline.
+
+    Returns
+    -------
+    bool
+        True when no regression was flagged.
+    """
+    engine = create_engine(bench_pg_uri, future=True)
+
+    if not skip_seed:
+        row_counts = seed_scaled_data(engine, scale)
+        for table, count in row_counts.items():
+            print(f"Seeded {table}: {count:,} rows (scale {scale})")
+
+    views = load_view_definitions()
+    create_views(engine, views)
+
+    baseline = load_baseline()
+    scale_key = f"scale_{scale:g}"
+    scale_baseline = baseline.get(scale_key, {})
+
+    results = {}
+    regressions = {}
+    for view_name in views:
+        results[view_name] = explain_view(engine, view_name, runs=runs)
+        summary = {k: v for k, v in results[view_name].items() if k != "plan"}
+        flags = compare_to_baseline(
+            summary, scale_baseline.get(view_name),
+            time_tolerance=time_tolerance, buffer_tolerance=buffer_tolerance
+        )
+        if flags:
+            regressions[view_name] = flags
+
+        status = "❌ REGRESSION" if flags else ("✅" if view_name in scale_baseline else "• (no baseline)")
+        print(
+            f"{status} {view_name}: {summary['execution_ms']:,.1f} ms, "
+            f"hit={summary['shared_hit_blocks']:,} read={summary['shared_read_blocks']:,}, "
+            f"rows={summary['rows']:,}"
+        )
+        for flag in flags:
+            print(f"    - {flag}")
+
+    # ---- keep the full plans of every run for later inspection ----
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    results_path = os.path.join(RESULTS_DIR, f"view_plans_{scale_key}_{stamp}.json")
+    with open(results_path, "w", encoding="utf-8") as f:
+        json.dump({"scale": scale, "runs": runs, "views": results}, f, indent=2)
+    print(f"Saved EXPLAIN output to: {results_path}")
+
+    if update_baseline:
+        baseline[scale_key] = {
+            view_name: {k: v for k, v in r.items() if k != "plan"} for view_name, r in results.items()
+        }
+        save_baseline(baseline)
+        print(f"Updated baseline for {scale_key}: {BASELINE_PATH}")
+
+    return not regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN-based performance regression harness for the curated views.")
+    parser.add_argument("--scale", type=float, default=1.0, help="data size multiplier (1 = roughly the real extracts)")
+    parser.add_argument("--runs", type=int, default=3, help="timed EXPLAIN ANALYZE runs per view (after one warm-up)")
+    parser.add_argument("--update-baseline", action="store_true", help="store the current numbers as the baseline")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already seeded at this scale")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="allowed relative execution time increase")
+    parser.add_argument("--buffer-tolerance", type=float, default=0.10, help="allowed relative buffer increase")
+    args = parser.parse_args()
+
+    # --- Get the benchmark Postgres URI; deliberately separate from the pipeline's PG_URI ---
+    BENCH_PG_URI = os.getenv("BENCH_PG_URI")
+    if not BENCH_PG_URI:
+        raise ValueError("Environment variable 'BENCH_PG_URI' is not set.")
+    if BENCH_PG_URI == os.getenv("PG_URI"):
+        raise ValueError("BENCH_PG_URI must not point at the pipeline database (PG_URI); seeding drops tables.")
+
+    ok = run_benchmark(
+        BENCH_PG_URI,
+        scale=args.scale,
+        runs=args.runs,
+        update_baseline=args.update_baseline,
+        skip_seed=args.skip_seed,
+        time_tolerance=args.time_tolerance,
+        buffer_tolerance=args.buffer_tolerance,
+    )
+    sys.exit(0 if ok else 1)
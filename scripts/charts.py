@@ -0,0 +1,249 @@
+# ================================================================
+# Description: Headless chart rendering for the analysis outputs.
+# This module:
+#   1) Describes charts declaratively (ChartSpec): what to plot, not how to drive pyplot.
+#   2) Imports matplotlib lazily, only when a chart is actually drawn, and forces the Agg backend
+#      (no display needed; safe on servers and in worker processes).
+#   3) Renders batches of charts (e.g. one per state) in a process pool.
+#   4) Skips re-rendering when the data behind a chart has not changed (a '.sha256' fingerprint
+#      file is kept next to each PNG).
+# ================================================================
+
+# ========= Import Lbraries and Dependencies =========
+from __future__ import annotations
+
+import hashlib                         # fingerprinting chart specs to detect unchanged charts
+import json                            # stable serialization of the spec before hashing
+import os                              # file paths and output directories
+import re                              # making state names safe for file names
+import pandas as pd                    # Python Data Analysis Library; for data manipulation and analysis
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+MIN_POOL_BATCH = 4  # fewer pending charts than this are rendered in-process
+
+
+# ========= Chart description =========
+@dataclass(frozen=True)
+class ChartSpec:
+    """
+    Declarative description of a bar chart.
+
+    Attributes
+    ----------
+    output_path : str
+        Where the PNG is written.
+    title, xlabel, ylabel : str
+        Chart texts.
+    labels : tuple of str
+        X-axis categories.
+    series : tuple of (name, values)
+        One entry per bar series; several series are drawn as grouped bars with a legend.
+    rotate_xticks : bool
+        Rotate x-axis labels by 45 degrees (for long labels such as SOC codes).
+    """
+    output_path: str
+    title: str
+    xlabel: str
+    ylabel: str
+    labels: Tuple[str, ...]
+    series: Tuple[Tuple[str, Tuple[float, ...]], ...]
+    rotate_xticks: bool = False
+
+    # ----- hash of everything that affects the image; unchanged hash = unchanged chart -----
+    def fingerprint(self) -> str:
+        payload = json.dumps(asdict(self), sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ----- This function converts a numeric column to a tuple of plain floats, the immutable form a frozen spec needs -----
+# Missing values stay NaN, so suppressed/top-coded OEWS wages ('*', '#') show as a gap rather than a $0 bar.
+def _values(series: pd.Series) -> Tuple[float, ...]:
+    return tuple(float(v) for v in pd.to_numeric(series, errors="coerce"))
+
+
+# ========= Chart builders for the analysis outputs =========
+def major_group_avg_chart(avg_wage_by_major: pd.DataFrame, save_dir: str) -> ChartSpec:
+    """Average annual mean wage by SOC major group (output of analyze_onet_oews_view)."""
+    return ChartSpec(
+        output_path=os.path.join(save_dir, "avg_wage_by_major_group.png"),
+        title="Average Annual Mean Wage by SOC Major Group",
+        xlabel="SOC Major Group (first two digits)",
+        ylabel="Average Annual Mean Wage",
+        labels=tuple(avg_wage_by_major["soc_major_group"].astype(str)),
+        series=(("avg_annual_mean_wage", _values(avg_wage_by_major["avg_annual_mean_wage"])),),
+    )
+
+
+def top_n_soc_chart(top_soc: pd.DataFrame, soc_col: str, save_dir: str, n: int = 10) -> ChartSpec:
+    """Top-N O*NET SOC codes by annual mean wage (output of analyze_onet_oews_view)."""
+    top_soc = top_soc.head(n)
+    return ChartSpec(
+        output_path=os.path.join(save_dir, f"top{n}_soc_by_wage.png"),
+        title=f"Top-{n} O*NET SOC Codes by Annual Mean Wage (average)",
+        xlabel="O*NET SOC Code",
+        ylabel="Average Annual Mean Wage",
+        labels=tuple(top_soc[soc_col].astype(str)),
+        series=(("avg_annual_mean_wage", _values(top_soc["avg_annual_mean_wage"])),),
+        rotate_xticks=True,
+    )
+
+
+def state_comparison_charts(
+    state_vs_weighted: pd.DataFrame,
+    save_dir: str,
+    top_n: int = 15,
+    states: Optional[Sequence[str]] = None
+) -> List[ChartSpec]:
+    """
+    One chart per state from curated.vw_oews_state_vs_weighted: the state's annual mean wage
+    next to the employment-weighted average across all states, for the state's top-N occupations
+    by employment.
+
+    Parameters
+    ----------
+    state_vs_weighted : pd.DataFrame
+        Rows of the view; needs occ_code, prim_state, state_tot_emp, state_a_mean, weighted_annual_mean_wage.
+    save_dir : str
+        Charts are written as '<save_dir>/state_vs_weighted_<state>.png'.
+    top_n : int
+        Number of occupations (largest state employment first) per chart.
+    states : sequence of str, optional
+        Only build charts for these states. If None, one chart per state in the data.
+    """
+    df = state_vs_weighted
+    if states is not None:
+        df = df[df["prim_state"].isin(states)]
+
+    specs = []
+    for state, state_df in df.groupby("prim_state", observed=True, sort=True):
+        top = (
+            state_df
+            .assign(state_tot_emp=pd.to_numeric(state_df["state_tot_emp"], errors="coerce"))
+            .sort_values(["state_tot_emp", "occ_code"], ascending=[False, True])
+            .head(top_n)
+        )
+        safe_state = re.sub(r"[^a-z0-9]+", "_", str(state).lower()).strip("_")
+        specs.append(ChartSpec(
+            output_path=os.path.join(save_dir, f"state_vs_weighted_{safe_state}.png"),
+            title=f"{str(state).upper()}: Annual Mean Wage vs Weighted Average (top {top_n} by employment)",
+            xlabel="OEWS occ_code",
+            ylabel="Annual Mean Wage",
+            labels=tuple(top["occ_code"].astype(str)),
+            series=(
+                ("state_a_mean", _values(top["state_a_mean"])),
+                ("weighted_annual_mean_wage", _values(top["weighted_annual_mean_wage"])),
+            ),
+            rotate_xticks=True,
+        ))
+    return specs
+
+
+# ========= Rendering =========
+# ----- Lazily import pyplot with the non-interactive Agg backend -----
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _fingerprint_path(spec: ChartSpec) -> str:
+    return f"{spec.output_path}.sha256"
+
+
+# ----- This function checks whether the PNG on disk was rendered from the same data -----
+def is_up_to_date(spec: ChartSpec) -> bool:
+    fp_path = _fingerprint_path(spec)
+    if not (os.path.exists(spec.output_path) and os.path.exists(fp_path)):
+        return False
+    with open(fp_path, encoding="utf-8") as f:
+        return f.read().strip() == spec.fingerprint()
+
+
+def render_chart(spec: ChartSpec, force: bool = False) -> bool:
+    """
+    Render one chart to its PNG file.
+
+    Returns
+    -------
+    bool
+        True if the chart was drawn, False if it was skipped because it was up to date.
+    """
+    if not force and is_up_to_date(spec):
+        return False
+
+    plt = _pyplot()
+    fig, ax = plt.subplots()
+    try:
+        positions = range(len(spec.labels))
+        width = 0.8 / max(1, len(spec.series))
+        for i, (name, values) in enumerate(spec.series):
+            offset = (i - (len(spec.series) - 1) / 2) * width
+            ax.bar([p + offset for p in positions], values, width=width, label=name)
+
+        ax.set_xticks(list(positions))
+        if spec.rotate_xticks:
+            ax.set_xticklabels(spec.labels, rotation=45, ha="right")
+        else:
+            ax.set_xticklabels(spec.labels)
+        ax.set_title(spec.title)
+        ax.set_xlabel(spec.xlabel)
+        ax.set_ylabel(spec.ylabel)
+        if len(spec.series) > 1:
+            ax.legend()
+        fig.tight_layout()
+
+        output_dir = os.path.dirname(spec.output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        fig.savefig(spec.output_path)
+    finally:
+        plt.close(fig)
+
+    # Fingerprint is written only after the PNG is saved, so a failed render is retried next time
+    with open(_fingerprint_path(spec), "w", encoding="utf-8") as f:
+        f.write(spec.fingerprint())
+    return True
+
+
+def render_charts(
+    specs: Sequence[ChartSpec],
+    max_workers: Optional[int] = None,
+    force: bool = False
+) -> Dict[str, bool]:
+    """
+    Render a batch of charts. Small batches (fewer than MIN_POOL_BATCH pending charts) are drawn
+    inline; larger ones (e.g. one chart per state) in a process pool.
+
+    Parameters
+    ----------
+    specs : sequence of ChartSpec
+        Charts to render.
+    max_workers : int, optional
+        Process pool size. Defaults to the number of CPUs, and never exceeds the number of pending charts.
+    force : bool
+        Re-render even if a chart is up to date.
+
+    Returns
+    -------
+    dict[str, bool]
+        Output path -> True if rendered, False if skipped as unchanged.
+    """
+    results = {spec.output_path: False for spec in specs}
+    pending = [spec for spec in specs if force or not is_up_to_date(spec)]
+
+    # Each worker imports matplotlib again; for a handful of charts that costs more than it saves
+    workers = min(len(pending), max_workers or os.cpu_count() or 1)
+    if len(pending) < MIN_POOL_BATCH or workers <= 1:
+        for spec in pending:
+            results[spec.output_path] = render_chart(spec, force=True)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = pool.map(render_chart, pending, [True] * len(pending))
+            for spec, was_rendered in zip(pending, rendered):
+                results[spec.output_path] = was_rendered
+
+    return results
@@ -1,16 +1,16 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import os
 import re
 from typing import Optional, Dict, List
 from sqlalchemy import create_engine
-from load_data import load_df_to_postgres # import the load function from load_data.py
+from load_data import load_df_to_postgres, publish_dataset_version # import the load/publish functions from load_data.py
+from data_store import export_dataframes_as_csv, read_dataframe_from_store, save_dataframes_to_store
 
 
-# -----Get dataframes from raw data files-----
-oews_df = pd.read_csv('data_output/raw/oews_raw_df.csv') 
-onet_skills_df = pd.read_csv('data_output/raw/onet_skills_raw_df.csv')
+# -----Get dataframes from the raw columnar store (written by load_data.py)-----
+raw_store_dir = "data_output/raw"
+onet_skills_df = read_dataframe_from_store("onet_skills_raw_df", raw_store_dir)
 
 # ---- Adhoc: test dataframees and columns ----
 # print(oews_df.info())
@@ -31,28 +31,24 @@ oews_selected_fields = [
 ]
 
 # ----- this function creates a new df based on selected fields. -----
-# ----- it takes in two arguments: file path and list of fields to select -----
-def dataframe_fields_selection(file_path: str, selected_fields: list) -> pd.DataFrame:
+# ----- it takes in three arguments: DataFrame name, list of fields to select and the store directory -----
+def dataframe_fields_selection(name: str, selected_fields: list, store_dir: str = raw_store_dir) -> pd.DataFrame:
     """
-    Read OEWS dataframe from CSV and select specified fields.
+    Read a dataframe from the columnar store, selecting only the specified fields.
 
     Args:
-        file_path (str): The path to the OEWS CSV file.
+        name (str): The stored DataFrame name, e.g. 'oews_raw_df'.
         selected_fields (list): A list of column names to select.
+        store_dir (str): The directory of the columnar store.
 
     Returns:
         pd.DataFrame: The dataframe with selected fields.
     """
-    # Read the OEWS dataframe
-    oews_df = pd.read_csv(file_path)
-
-    # Create new dataframe with selected fields
-    oews_selected_df = oews_df[selected_fields]
-
-    return oews_selected_df
+    # Only the selected columns are read from the (memory-mapped) file
+    return read_dataframe_from_store(name, store_dir, columns=selected_fields)
 
 # ----- call the function to create a new dataframe with selected fields -----
-oews_selected_df = dataframe_fields_selection('data_output/raw/oews_raw_df.csv', oews_selected_fields) 
+oews_selected_df = dataframe_fields_selection('oews_raw_df', oews_selected_fields) 
 
 # ----- rename dataframes to be cleaned -----
 oews_selected_df = oews_selected_df.copy()
@@ -123,6 +119,11 @@ def clean_dataframe(
 
     # --- Step 1: Trim whitespaces and replace blanks in ALL string/object columns ---
     for col in df.columns:
+        # categoricals (written by load_data.py) are trimmed but kept as categoricals;
+        # is_string_dtype is True for string categories, so they must be handled first
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("object").str.strip().replace({"": pd.NA}).astype("category")
+            continue
         if df[col].dtype == "object" or pd.api.types.is_string_dtype(df[col]):
             df[col] = df[col].astype(str).str.strip()  # trim whitespace
             df[col] = df[col].replace({"": pd.NA})     # replace empty strings with NaN
@@ -173,34 +174,13 @@ for name, df in cleaned_dataframes.items():
     table_name = name
     load_df_to_postgres(df, table_name=table_name, pg_uri=PG_URI, schema=schema, if_exists="replace")
 
-# ----- Save cleaned DataFrames as CSV files ----
+# ---- publish a new curated version so readers (query_service.py) refresh their caches ----
+publish_dataset_version(PG_URI, schema=schema, source="data_prep.py")
+
+# ----- Save cleaned DataFrames to the curated columnar store ----
 output_dir = "data_output/curated"
-# save_dataframes_as_csv(cleaned_dataframes, output_dir)
-
-def save_dataframes_as_csv(dataframes: dict, output_dir: str) -> None:
-    
-    # Save multiple DataFrames as CSV.
-
-    # Args:
-    #     dataframes (dict): A dictionary where keys are file names (without extension) 
-    #                        and values are pandas DataFrames.
-    #     output_dir (str): The directory where the Parquet/csv files will be saved.
-    
-    for name, df in cleaned_dataframes.items():
-        # ensure df is not empty
-        if df.empty:
-            print(f"⚠️ Warning: DataFrame '{name}' is empty. Skipping save.")
-            continue
-        # construct file path   
-        # file_path = f"{output_dir}/{name}.parquet"
-        file_path = f"{output_dir}/{name}.csv"
-        
-        #  Save DataFrame as Parquet / csv file; and print confirmation. 
-        # df.to_parquet(file_path, index=False)
-        df.to_csv(file_path, index=False)
-        # print(f"✅ Saved {name} to {file_path}")
-        
-    # print(f"\n🎉 All DataFrames saved successfully to: {output_dir}")    
+save_dataframes_to_store(cleaned_dataframes, output_dir)
 
-# --- Call the function to save cleaned DataFrames as Parquet/csv files ----
-save_dataframes_as_csv(cleaned_dataframes, output_dir)
\ No newline at end of file
+# --- Optional: also export CSV files (set EXPORT_CSV=1) ----
+if os.getenv("EXPORT_CSV", "").lower() in ("1", "true", "yes"):
+    export_dataframes_as_csv(cleaned_dataframes, output_dir)
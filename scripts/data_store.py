@@ -0,0 +1,222 @@
+# ================================================================
+# Description: Columnar intermediate store used to hand DataFrames between pipeline stages.
+# Each DataFrame is written as an Arrow IPC (Feather v2) file. Unlike CSV, this:
+#   1) keeps column dtypes (numeric, string, categorical) exactly as they were written,
+#   2) can be memory-mapped: 'read_table_from_store' returns an Arrow table backed by the file itself
+#      (no copy); converting to pandas ('read_dataframe_from_store') copies only the projected columns,
+#   3) supports column projection, so a stage only reads the fields it actually needs.
+# CSV export is kept as an optional final step (see 'export_dataframes_as_csv').
+# ================================================================
+
+# ======== Dependencies Installation ========
+# --- pip install pandas pyarrow
+# ===========================================
+
+# ========= Import Lbraries and Dependencies =========
+from __future__ import annotations
+
+import os                              # building file paths and creating output directories
+import pandas as pd                    # Python Data Analysis Library; for data manipulation and analysis
+import pyarrow as pa                   # Arrow in-memory columnar format
+import pyarrow.feather as feather      # Arrow IPC (Feather v2) read/write
+from typing import Dict, List, Optional
+
+
+STORE_EXTENSION = "arrow"  # file extension used for the Arrow IPC files in the store
+
+
+# ----- This function builds the store file path for a given DataFrame name -----
+def store_path(name: str, store_dir: str) -> str:
+    return os.path.join(store_dir, f"{name}.{STORE_EXTENSION}")
+
+
+# ----- This function converts low-cardinality string columns to 'category' -----
+# Categoricals are written as Arrow dictionary arrays, so they come back as categoricals on read.
+def to_categoricals(
+    df: pd.DataFrame,
+    categorical_fields: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Convert the given columns to the pandas 'category' dtype.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The input DataFrame.
+    categorical_fields : list of str, optional
+        Columns to convert. Columns not present in the DataFrame are skipped.
+
+    Returns
+    -------
+    pd.DataFrame
+        A copy of the DataFrame with the selected columns as categoricals.
+    """
+    df = df.copy()
+    for col in categorical_fields or []:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+        else:
+            print(f"⚠️ Warning: Column '{col}' not found in DataFrame. Skipping.")
+    return df
+
+
+# ----- This function makes mixed-type object columns Arrow-compatible -----
+# Raw Excel extracts mix numbers and footnote markers (e.g. '*', '#') in the same column.
+# Arrow needs a single type per column, so such columns are stored as strings (missing values stay missing).
+def normalize_mixed_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype != "object":
+            continue
+        if pd.api.types.infer_dtype(df[col], skipna=True) in ("mixed", "mixed-integer"):
+            df[col] = df[col].map(lambda x: x if pd.isna(x) else str(x))
+    return df
+
+
+# +++++++ Save multiple DataFrames to the columnar store +++++++
+def save_dataframes_to_store(
+    dataframes: Dict[str, pd.DataFrame],
+    store_dir: str,
+    compression: str = "uncompressed"
+) -> Dict[str, str]:
+    """
+    Save multiple DataFrames as Arrow IPC (Feather v2) files.
+
+    Parameters
+    ----------
+    dataframes : dict[str, pd.DataFrame]
+        Keys are file names (without extension), values are the DataFrames to save.
+    store_dir : str
+        Directory where the Arrow files will be saved. Created if it does not exist.
+    compression : str
+        'uncompressed' (default) keeps the files memory-mappable without decompression.
+        'lz4' or 'zstd' give smaller files at the cost of a decode step on read.
+
+    Returns
+    -------
+    dict[str, str]
+        Mapping of DataFrame name to the saved file path.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+
+    saved_paths = {}
+    for name, df in dataframes.items():
+        # ensure df is not empty
+        if df.empty:
+            print(f"⚠️ Warning: DataFrame '{name}' is empty. Skipping save.")
+            continue
+
+        file_path = store_path(name, store_dir)
+
+        # Write to a temporary file first so a reader never sees a half-written file
+        tmp_path = f"{file_path}.tmp"
+        table = pa.Table.from_pandas(normalize_mixed_columns(df), preserve_index=False)
+        feather.write_feather(table, tmp_path, compression=compression)
+        os.replace(tmp_path, file_path)
+
+        saved_paths[name] = file_path
+        # print(f"✅ Saved {name} to {file_path}")
+
+    return saved_paths
+
+
+# ----- This function returns the stored schema without reading any data -----
+def read_store_schema(name: str, store_dir: str) -> pa.Schema:
+    with pa.memory_map(store_path(name, store_dir), "r") as source:
+        return pa.ipc.open_file(source).schema
+
+
+# +++++++ Read an Arrow table back from the columnar store +++++++
+def read_table_from_store(
+    name: str,
+    store_dir: str,
+    columns: Optional[List[str]] = None,
+    memory_map: bool = True
+) -> pa.Table:
+    """
+    Read a stored DataFrame as an Arrow table, without converting it to pandas.
+
+    Parameters
+    ----------
+    name : str
+        DataFrame name (file name without extension), e.g. 'oews_raw_df'.
+    store_dir : str
+        Directory containing the Arrow files.
+    columns : list of str, optional
+        Only these columns are read (column projection). If None, all columns are read.
+    memory_map : bool
+        If True (default) and the file is uncompressed, the table's buffers point into the
+        memory-mapped file: pages are loaded by the OS as they are touched, and nothing is copied.
+        If False, the projected columns are read into memory.
+
+    Returns
+    -------
+    pa.Table
+        The stored table.
+    """
+    file_path = store_path(name, store_dir)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(
+            f"No stored DataFrame '{name}' in {store_dir}. Run the upstream stage first."
+        )
+
+    # Check the requested columns against the stored schema (no data is read) for a clear error
+    if columns is not None:
+        stored_columns = set(read_store_schema(name, store_dir).names)
+        missing = [col for col in columns if col not in stored_columns]
+        if missing:
+            raise ValueError(f"Columns {missing} not found in stored DataFrame '{name}'.")
+
+    return feather.read_table(file_path, columns=columns, memory_map=memory_map)
+
+
+# +++++++ Read a DataFrame back from the columnar store +++++++
+def read_dataframe_from_store(
+    name: str,
+    store_dir: str,
+    columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Read a DataFrame from the Arrow IPC store.
+
+    The file is memory-mapped, so only the projected columns are read from disk; the conversion
+    to pandas then copies those columns into pandas-owned memory. Use 'read_table_from_store'
+    to work on the memory-mapped Arrow table directly.
+
+    Parameters
+    ----------
+    name : str
+        DataFrame name (file name without extension), e.g. 'oews_raw_df'.
+    store_dir : str
+        Directory containing the Arrow files.
+    columns : list of str, optional
+        Only these columns are read (column projection). If None, all columns are read.
+
+    Returns
+    -------
+    pd.DataFrame
+        The stored DataFrame with its original dtypes (including categoricals).
+    """
+    return read_table_from_store(name, store_dir, columns=columns).to_pandas()
+
+
+# +++++++ Optional final step: export DataFrames as CSV +++++++
+def export_dataframes_as_csv(dataframes: Dict[str, pd.DataFrame], output_dir: str) -> None:
+    """
+    Save multiple DataFrames as CSV, e.g. for sharing outside the pipeline.
+
+    Parameters
+    ----------
+    dataframes : dict[str, pd.DataFrame]
+        Keys are file names (without extension), values are the DataFrames to save.
+    output_dir : str
+        Directory where the CSV files will be saved. Created if it does not exist.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    for name, df in dataframes.items():
+        # ensure df is not empty
+        if df.empty:
+            print(f"⚠️ Warning: DataFrame '{name}' is empty. Skipping save.")
+            continue
+        df.to_csv(os.path.join(output_dir, f"{name}.csv"), index=False)
@@ -0,0 +1,329 @@
+# ================================================================
+# Description: Resumable, parallel ranged downloader for the large public datasets.
+# This module:
+#   1) Fetches a file in parallel HTTP Range segments over one pooled requests.Session.
+#   2) Writes into '<dest>.part' and keeps progress in '<dest>.part.json', so an interrupted
+#      download resumes where each segment stopped instead of restarting the whole transfer.
+#   3) Retries failed requests with exponential backoff (plus jitter); every request has a timeout.
+#   4) Verifies the size (and the SHA-256 when known) before the file is handed to the parser.
+#      ZIP-based files (ZIP, XLSX) are also checked member by member (CRC), even without a known SHA-256.
+# Servers without Range support fall back to a single streamed request.
+# ================================================================
+
+# ========= Import Lbraries and Dependencies =========
+from __future__ import annotations
+
+import hashlib                         # SHA-256 integrity check
+import json                            # progress state file
+import os                              # file paths, atomic rename
+import random                          # jitter for the retry backoff
+import re                              # parsing the Content-Range header
+import threading                       # protecting the shared progress state
+import time                            # backoff sleeps
+import zipfile                         # structural check of ZIP/XLSX downloads
+import requests                        # HTTP client
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import List, Optional, Tuple
+
+
+# identity encoding: byte offsets and sizes must match the raw file, not a gzip/deflate-decoded body
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": "identity"}  # browser UA (BLS rejects the default)
+DEFAULT_TIMEOUT = (10, 60)                        # (connect, read) seconds
+CHUNK_SIZE = 1024 * 1024                          # bytes read from the socket per write
+STATE_SAVE_EVERY = 8                              # chunks written between progress state saves
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+# ----- This function creates a pooled session shared by all segment requests -----
+def build_session(pool_size: int = 8, headers: Optional[dict] = None) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({**DEFAULT_HEADERS, **(headers or {})})
+    return session
+
+
+# ----- This function rejects encoded bodies; requests would decode them and break the byte offsets -----
+def _require_identity_encoding(resp: requests.Response, url: str) -> None:
+    encoding = resp.headers.get("Content-Encoding", "identity").strip().lower()
+    if encoding not in ("", "identity"):
+        raise ValueError(f"Server sent {url} with Content-Encoding '{encoding}'; only identity is supported.")
+
+
+# ----- This function retries 'request_fn' with exponential backoff on network errors and retryable statuses -----
+def _with_retries(request_fn, max_retries: int, backoff_base: float, backoff_max: float):
+    for attempt in range(max_retries + 1):
+        try:
+            return request_fn()
+        except requests.HTTPError as exc:
+            status = exc.response.status_code if exc.response is not None else None
+            if status not in RETRYABLE_STATUS or attempt == max_retries:
+                raise
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+            if attempt == max_retries:
+                raise
+        delay = min(backoff_max, backoff_base * 2 ** attempt) * (0.5 + random.random() / 2)
+        time.sleep(delay)
+
+
+# ========= Probe the remote file =========
+def probe(session: requests.Session, url: str, timeout=DEFAULT_TIMEOUT) -> Tuple[Optional[int], bool, Optional[str]]:
+    """
+    Find the remote size, Range support and validator (ETag / Last-Modified) with a 1-byte ranged GET.
+
+    A ranged GET is used instead of HEAD because some servers omit Content-Length on HEAD.
+
+    Returns
+    -------
+    (size, accepts_ranges, validator)
+    """
+    with session.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=timeout) as resp:
+        resp.raise_for_status()
+        _require_identity_encoding(resp, url)
+        validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+        if resp.status_code == 206:
+            m = re.match(r"bytes \d+-\d+/(\d+)", resp.headers.get("Content-Range", ""))
+            if m:
+                return int(m.group(1)), True, validator
+        length = resp.headers.get("Content-Length")
+        return (int(length) if length and resp.status_code == 200 else None), False, validator
+
+
+# ========= Progress state (resume support) =========
+def _split(size: int, segments: int, min_segment_size: int) -> List[List[int]]:
+    # [start, end (inclusive), bytes done]
+    count = max(1, min(segments, size // max(1, min_segment_size)))
+    bounds = [size * i // count for i in range(count + 1)]
+    return [[bounds[i], bounds[i + 1] - 1, 0] for i in range(count)]
+
+
+def _load_state(state_path: str, part_path: str, url: str, size: Optional[int], validator: Optional[str]) -> Optional[dict]:
+    if not (os.path.exists(state_path) and os.path.exists(part_path)):
+        return None
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Only resume when the remote file is the same one the partial download came from
+    if state.get("url") != url or state.get("size") != size or state.get("validator") != validator:
+        return None
+    return state
+
+
+def _save_state(state_path: str, state: dict) -> None:
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+# ========= Integrity checks =========
+def sha256_of(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_file(path: str, expected_size: Optional[int] = None, expected_sha256: Optional[str] = None) -> str:
+    """
+    Check the size and SHA-256 of a downloaded file; raise ValueError on mismatch.
+
+    Returns
+    -------
+    str
+        The file's SHA-256 hex digest.
+    """
+    actual_size = os.path.getsize(path)
+    if expected_size is not None and actual_size != expected_size:
+        raise ValueError(f"Size mismatch for '{path}': expected {expected_size:,} bytes, got {actual_size:,}.")
+    digest = sha256_of(path)
+    if expected_sha256 and digest.lower() != expected_sha256.lower():
+        raise ValueError(f"SHA-256 mismatch for '{path}': expected {expected_sha256}, got {digest}.")
+    return digest
+
+
+# ----- This function checks that a ZIP-based file (ZIP, XLSX) is readable and every member's CRC matches -----
+# Without a pinned SHA-256 this is what stops a spliced or truncated file of the right size reaching the parser.
+ZIP_EXTENSIONS = (".zip", ".xlsx", ".xlsm")
+
+
+def verify_structure(path: str, file_name: str) -> None:
+    if not file_name.lower().endswith(ZIP_EXTENSIONS):
+        return
+    try:
+        with zipfile.ZipFile(path) as z:
+            bad_member = z.testzip()
+    except zipfile.BadZipFile as exc:
+        raise ValueError(f"'{path}' is not a valid ZIP archive: {exc}") from exc
+    if bad_member is not None:
+        raise ValueError(f"'{path}' is corrupt: CRC mismatch in member '{bad_member}'.")
+
+
+# ========= Download =========
+def download_file(
+    url: str,
+    dest_path: str,
+    *,
+    session: Optional[requests.Session] = None,
+    segments: int = 4,
+    min_segment_size: int = 8 * 1024 * 1024,
+    expected_size: Optional[int] = None,
+    expected_sha256: Optional[str] = None,
+    timeout=DEFAULT_TIMEOUT,
+    max_retries: int = 5,
+    backoff_base: float = 1.0,
+    backoff_max: float = 30.0
+) -> str:
+    """
+    Download 'url' to 'dest_path' in parallel ranged segments, resuming any partial download.
+
+    Parameters
+    ----------
+    url : str
+        File to download.
+    dest_path : str
+        Final file path. The file only appears here after it passed the size/hash/structure checks.
+    session : requests.Session, optional
+        Pooled session to reuse (see build_session). A new one is created if None.
+    segments : int
+        Maximum number of parallel Range requests.
+    min_segment_size : int
+        Files smaller than segments * min_segment_size use fewer segments.
+    expected_size, expected_sha256 : optional
+        Known size / SHA-256 of the file. The size reported by the server is always checked.
+        If dest_path already exists and matches expected_sha256, the download is skipped.
+    timeout : float or (connect, read) tuple
+        Per-request timeout in seconds.
+    max_retries : int
+        Retries per request (each segment retries on its own, resuming from its last byte).
+    backoff_base, backoff_max : float
+        Exponential backoff: min(backoff_max, backoff_base * 2**attempt) seconds, with jitter.
+
+    Returns
+    -------
+    str
+        dest_path
+    """
+    if expected_sha256 and os.path.exists(dest_path):
+        try:
+            verify_file(dest_path, expected_size, expected_sha256)
+            print(f"✅ {dest_path} is up to date. Skipping download.")
+            return dest_path
+        except ValueError:
+            pass
+
+    session = session or build_session(pool_size=segments)
+    dest_dir = os.path.dirname(dest_path)
+    if dest_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+    part_path = f"{dest_path}.part"
+    state_path = f"{part_path}.json"
+
+    size, accepts_ranges, validator = _with_retries(
+        lambda: probe(session, url, timeout), max_retries, backoff_base, backoff_max
+    )
+    if expected_size is not None and size is not None and size != expected_size:
+        raise ValueError(f"Remote size of {url} is {size:,} bytes; expected {expected_size:,}.")
+
+    if accepts_ranges and size:
+        state = _load_state(state_path, part_path, url, size, validator)
+        if state is None:
+            state = {"url": url, "size": size, "validator": validator,
+                     "segments": _split(size, segments, min_segment_size)}
+            with open(part_path, "wb") as f:
+                f.truncate(size)  # preallocate so every segment can write at its own offset
+            _save_state(state_path, state)
+        else:
+            done = sum(seg[2] for seg in state["segments"])
+            print(f"Resuming {url}: {done:,} of {size:,} bytes already downloaded.")
+
+        lock = threading.Lock()
+
+        def fetch_segment(seg: List[int]) -> None:
+            def attempt() -> None:
+                start, end, done = seg
+                if start + done > end:
+                    return
+                headers = {"Range": f"bytes={start + done}-{end}"}
+                with session.get(url, headers=headers, stream=True, timeout=timeout) as resp:
+                    resp.raise_for_status()
+                    if resp.status_code != 206:
+                        raise ValueError(f"Server ignored the Range request for {url} (status {resp.status_code}).")
+                    _require_identity_encoding(resp, url)
+                    # the body must be exactly the requested range, or it would be spliced in at the wrong offset
+                    m = re.match(r"bytes (\d+)-(\d+)/(\d+|\*)", resp.headers.get("Content-Range", ""))
+                    if not m or (int(m.group(1)), int(m.group(2))) != (start + done, end):
+                        raise ValueError(
+                            f"Server answered bytes={start + done}-{end} of {url} with "
+                            f"Content-Range '{resp.headers.get('Content-Range')}'."
+                        )
+                    with open(part_path, "r+b") as f:
+                        f.seek(start + done)
+                        unflushed = 0
+                        try:
+                            for i, chunk in enumerate(resp.iter_content(CHUNK_SIZE), start=1):
+                                if not chunk:
+                                    continue
+                                if start + seg[2] + unflushed + len(chunk) > end + 1:
+                                    raise ValueError(f"Server sent more than bytes={start + done}-{end} of {url}.")
+                                f.write(chunk)
+                                unflushed += len(chunk)
+                                if i % STATE_SAVE_EVERY == 0:
+                                    # bytes are only counted once flushed, so the saved progress never
+                                    # claims data that is not in the .part file
+                                    f.flush()
+                                    with lock:
+                                        seg[2] += unflushed
+                                        _save_state(state_path, state)
+                                    unflushed = 0
+                        finally:
+                            # also keep the bytes received before a dropped connection
+                            f.flush()
+                            with lock:
+                                seg[2] += unflushed
+                                _save_state(state_path, state)
+                if start + seg[2] <= end:
+                    # connection closed early without an error; let the retry pick up the rest
+                    raise requests.exceptions.ChunkedEncodingError(f"Segment {start}-{end} of {url} ended early.")
+
+            _with_retries(attempt, max_retries, backoff_base, backoff_max)
+
+        pending = [seg for seg in state["segments"] if seg[0] + seg[2] <= seg[1]]
+        if pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+                # list() re-raises the first segment error after retries are exhausted
+                list(pool.map(fetch_segment, pending))
+    else:
+        # No Range support: one streamed request; a retry restarts from the beginning
+        def attempt() -> None:
+            with session.get(url, stream=True, timeout=timeout) as resp:
+                resp.raise_for_status()
+                _require_identity_encoding(resp, url)
+                with open(part_path, "wb") as f:
+                    for chunk in resp.iter_content(CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+
+        _with_retries(attempt, max_retries, backoff_base, backoff_max)
+
+    # ---- verify before the file is handed to the parser ----
+    try:
+        digest = verify_file(part_path, expected_size if expected_size is not None else size, expected_sha256)
+        verify_structure(part_path, dest_path)
+    except ValueError:
+        # a corrupt partial file cannot be resumed; start clean next time
+        for path in (part_path, state_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+    os.replace(part_path, dest_path)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    print(f"✅ Downloaded {url} -> {dest_path} ({os.path.getsize(dest_path):,} bytes, sha256 {digest})")
+    return dest_path
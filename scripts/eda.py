@@ -9,14 +9,14 @@
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 
 # ========== Import necessary libraries ==========
-import pandas as pd
 from ydata_profiling import ProfileReport
+from data_store import read_dataframe_from_store
 
 
 # +++++++ EDA Profiling Report Generation +++++++
 
 # 1. ------- Importing dataset: OEWS Dataset
-oews_df = pd.read_csv('data_output/raw/oews_raw_df.csv') 
+oews_df = read_dataframe_from_store('oews_raw_df', 'data_output/raw') 
 
 # 2. ------- Generate the Profile Report object 
 oews_profile = ProfileReport(
@@ -32,7 +32,7 @@ oews_profile.to_file("oews_profiling_report.html")
 # ************ Repeat the above steps for the ONET Skills dataset ************
 
 # 1. ------- Importing dataset
-onet_skills_df = pd.read_csv('data_output/raw/onet_skills_raw_df.csv') 
+onet_skills_df = read_dataframe_from_store('onet_skills_raw_df', 'data_output/raw') 
 
 # 2. ------- Generate the Profile Report object
 onet_skills_profile = ProfileReport(
@@ -16,21 +16,26 @@
 # ======== Dependencies Installation ========
 # Before running the script, ensure you have the required libraries installed.
 # --- pip install sqlalchemy requests ydata-profiling matplotlib
-# --- pip install pandas openpyxl psycopg2-binary beautifulsoup4
+# --- pip install pandas openpyxl psycopg2-binary beautifulsoup4 pyarrow
 # ===========================================
 
 # ========= Import Lbraries and Dependencies =========
 from __future__ import annotations     # Enables postponed evaluation of type hints for cleaner, forward-compatible annotations
 
-import io                              # handling of in-memory file-like objects; for reading HTML/text streams
 import os                              # operating system; reading environment variables
 import re                              # Regular expressions for text pattern matching and data cleaning
 import pandas as pd                    # Python Data Analysis Library; for data manipulation and analysis
-import requests                        # HTTP client for fetching web data (HTML tables, text files from URLs)
 import zipfile                        # handling ZIP files; for extracting compressed datasets
 from sqlalchemy import create_engine, text   # SQLAlchemy tool to create a database connection engine
 from sqlalchemy.dialects.postgresql import BIGINT, NUMERIC, TEXT  # PostgreSQL-specific column types for precise table schema control
 from typing import Dict, Callable, Optional      # Code clarity; type hints for dictionaries (e.g., Dict[str, str])
+from downloader import build_session, download_file   # Resumable, parallel ranged downloads with retry and integrity checks
+from data_store import (               # Columnar (Arrow IPC) store used to hand DataFrames to the next stages
+    export_dataframes_as_csv,
+    read_dataframe_from_store,
+    save_dataframes_to_store,
+    to_categoricals,
+)
 
 
 
@@ -45,15 +50,28 @@ from typing import Dict, Callable, Optional      # Code clarity; type hints for
 oews_url = "https://www.bls.gov/oes/special-requests/oesm24st.zip"
 o_net_skills_url = "https://www.onetcenter.org/dl_files/database/db_30_0_excel/Skills.xlsx"
 
+# ----- Downloaded files are kept here; interrupted downloads resume from '<file>.part' -----
+download_dir = "data_output/downloads"
+
+# ----- Optional known checksums (e.g. pinned for the nightly run); size is always verified -----
+oews_sha256 = os.getenv("OEWS_SHA256")
+o_net_skills_sha256 = os.getenv("ONET_SKILLS_SHA256")
+
+# --- One pooled session (browser-like User-Agent) shared by all downloads ---
+session = build_session()
+
 # ************ Data Extraction ************
 # ++++++++ OEWS by State Extraction ++++++++
-# --- Download ZIP into memory
-headers = {"User-Agent": "Mozilla/5.0"}  # pretend to be a browser
-resp = requests.get(oews_url, headers=headers)
-resp.raise_for_status()
+# --- Download ZIP to disk in parallel ranged segments (resumable, retried, verified)
+oews_zip_path = download_file(
+    oews_url,
+    os.path.join(download_dir, os.path.basename(oews_url)),
+    session=session,
+    expected_sha256=oews_sha256,
+)
 
 # --- Open the ZIP and list its contents
-with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
+with zipfile.ZipFile(oews_zip_path) as z:
     print("Files in ZIP:", z.namelist())
     # Note: this should display ['oesm24st/state_M2024_dl.xlsx'] because it is downloading 2024 data
 
@@ -76,21 +94,24 @@ with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
 
 # ++++++++ O*NET Datasets Extraction ++++++++
 # This function fetches O*NET data from given URL and return a DataFrame
-def fetch_onet_data(url: str) -> pd.DataFrame:
-    # Download file into memory (using a browser-like header)
-    headers = {"User-Agent": "Mozilla/5.0"}
-    resp = requests.get(url, headers=headers, timeout=60)
-    resp.raise_for_status()  # will raise HTTPError if download fails
+def fetch_onet_data(url: str, expected_sha256: Optional[str] = None) -> pd.DataFrame:
+    # Download file to disk (resumable, retried, size/hash verified; will raise if download fails)
+    file_path = download_file(
+        url,
+        os.path.join(download_dir, os.path.basename(url)),
+        session=session,
+        expected_sha256=expected_sha256,
+    )
 
-    # Read Excel directly from memory into pandas
-    df = pd.read_excel(io.BytesIO(resp.content))
+    # Read Excel from the verified file into pandas
+    df = pd.read_excel(file_path)
 
     # # (Optional) show basic info
     # print(f"Loaded {len(df):,} rows and {len(df.columns)} columns.")
     return df
 
 #  ------ Run function to get O_Net DataFrames ------
-o_net_skills_df = fetch_onet_data(o_net_skills_url)
+o_net_skills_df = fetch_onet_data(o_net_skills_url, o_net_skills_sha256)
 
 # ---- Verify O*NET DataFrames ----
 # print(o_net_occupation_titles_df.head())
@@ -173,46 +194,34 @@ for name, df in dataframes.items():
 
 # ************ Data Loading Section ************
 # There are two fuunctions in this section:
-# 1. Saves the output of cleaned DF as a csv file. Can be easily called for pandas analyssis later.
+# 1. Saves the cleaned DFs to the columnar (Arrow IPC) store. Later stages read them back with dtypes intact.
+#    CSV export is an optional final step (set EXPORT_CSV=1).
 # 2. The second function loads the DF into PostreSQL tables
 
 
-# +++++++ 1. Save cleaned DF as csv file +++++++
-output_dir = "data_output/raw"  # output directory to save raw/cleaned parquet/csv files
+# +++++++ 1. Save cleaned DF to the columnar store +++++++
+output_dir = "data_output/raw"  # output directory to save raw/cleaned arrow/csv files
 
-def save_dataframes_as_csv(dataframes: dict, output_dir: str) -> None:
-    
-    # Save multiple DataFrames as CSV.
+# ---- low-cardinality fields stored as categoricals (kept as categoricals on read) ----
+raw_categorical_fields = {
+    "oews_raw_df": ["area_title", "prim_state", "o_group"],
+    "onet_skills_raw_df": ["scale_id", "scale_name", "element_name"],
+}
 
-    # Args:
-    #     dataframes (dict): A dictionary where keys are file names (without extension) 
-    #                        and values are pandas DataFrames.
-    #     output_dir (str): The directory where the Parquet/csv files will be saved.
-    
-    for name, df in cleaned_dfs.items():
-        # ensure df is not empty
-        if df.empty:
-            print(f"⚠️ Warning: DataFrame '{name}' is empty. Skipping save.")
-            continue
-        # construct file path   
-        # file_path = f"{output_dir}/{name}.parquet"
-        file_path = f"{output_dir}/{name}.csv"
-        
-        #  Save DataFrame as Parquet / csv file; and print confirmation. 
-        # df.to_parquet(file_path, index=False)
-        df.to_csv(file_path, index=False)
-        # print(f"✅ Saved {name} to {file_path}")
-        
-    # print(f"\n🎉 All DataFrames saved successfully to: {output_dir}")    
-
-# --- Call the function to save cleaned DataFrames as Parquet/csv files ----
-save_dataframes_as_csv(cleaned_dfs, output_dir)
+for name in cleaned_dfs:
+    cleaned_dfs[name] = to_categoricals(cleaned_dfs[name], raw_categorical_fields.get(name))
+
+# --- Call the function to save cleaned DataFrames to the store ----
+save_dataframes_to_store(cleaned_dfs, output_dir)
+
+# --- Optional: also export CSV files (e.g. for sharing outside the pipeline) ---
+if os.getenv("EXPORT_CSV", "").lower() in ("1", "true", "yes"):
+    export_dataframes_as_csv(cleaned_dfs, output_dir)
 
 
 # --------- Perform some Tests on saved files ---------
-# --- Testing on saved DF files ----
-full_path = os.path.join(output_dir, 'oews_raw_df.csv') # join folder path and file together for a single path to use in pd.readcsv()
-filtered_df = pd.read_csv(full_path)
+# --- Testing on saved DF files (memory-mapped; only the columns needed are read) ----
+filtered_df = read_dataframe_from_store("oews_raw_df", output_dir, columns=["occ_code", "occ_title", "prim_state"])
 # print(filtered_df.head())
 # print(filtered_df.columns)
 # print(filtered_df.describe())
@@ -263,6 +272,29 @@ def load_df_to_postgres(
 # with engine.connect() as conn:
 #     conn.execute("CREATE INDEX idx_column_name ON table_name(column_name);")    
 
+# +++++++ 3. Publish a new dataset version +++++++
+# Readers (e.g. query_service.py) poll this table and refresh their in-memory caches when a new version appears.
+def publish_dataset_version(pg_uri: str, schema: str = "curated", source: str = "") -> int:
+    
+    # Record that the tables in 'schema' were (re)loaded and return the new version number.
+    engine = create_engine(pg_uri, future=True)
+    with engine.begin() as conn:
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+        conn.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{schema}".dataset_version ('
+            '  version BIGSERIAL PRIMARY KEY,'
+            '  published_at TIMESTAMPTZ NOT NULL DEFAULT now(),'
+            '  source TEXT'
+            ')'
+        ))
+        version = conn.execute(
+            text(f'INSERT INTO "{schema}".dataset_version (source) VALUES (:source) RETURNING version'),
+            {"source": source},
+        ).scalar_one()
+
+    # print(f"✅ Published {schema} version {version}")
+    return version
+
 # +++++++ Call the function to load DataFrames into Postgres +++++++
 # --- Get Postgres connection URI from environment variable ---
 PG_URI = os.getenv("PG_URI")
@@ -0,0 +1,415 @@
+# ================================================================
+# Description: Low-latency, read-only HTTP query service over the curated wage and skill aggregates.
+# This script:
+#   1) Connects to the DB through a pooled async SQLAlchemy engine (asyncpg for Postgres).
+#   2) Keeps hot aggregates (wage stats per SOC/state, top skills per SOC) in an in-memory cache,
+#      so requests are answered without a DB round trip.
+#   3) Polls curated.dataset_version (written by publish_dataset_version in load_data.py) and
+#      rebuilds the cache when the loaders publish a new version.
+#   4) Records per-route latency and exposes p50/p99 on /metrics.
+#
+# Endpoints (GET, JSON responses):
+#   /health                               -> {"status": "ok", "version": ...}
+#   /wages?soc=29-1141&state=md           -> wage stats for SOC 29-1141 in Maryland (omit state for all states)
+#   /skills?soc=29-1141.01&top=10         -> top skills by importance ('im' scale); a 6-digit SOC averages its O*NET children
+#   /metrics                              -> request counts and p50/p99 latency per route (ms)
+#
+# Usage (from the repo root):
+#   PG_URI=postgresql://<user>:<password>@localhost:5432/arena_de_prep_db python scripts/query_service.py
+#   For an embedded stand-in (e.g. tests), pass a 'sqlite+aiosqlite://' URI and schema=None.
+# ================================================================
+
+# ======== Dependencies Installation ========
+# --- pip install sqlalchemy asyncpg          (aiosqlite for an embedded SQLite stand-in)
+# ===========================================
+
+# ========= Import Lbraries and Dependencies =========
+from __future__ import annotations
+
+import asyncio                         # event loop, TCP server and the background refresh task
+import json                            # JSON responses
+import math                            # nearest-rank percentile
+import os                              # environment variables
+import time                            # request latency measurement
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+
+# ========= Set up the async DB engine =========
+# ----- This function maps the pipeline's sync URI to its async driver equivalent -----
+def to_async_uri(uri: str) -> str:
+    for prefix, async_prefix in [
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ]:
+        if uri.startswith(prefix):
+            return async_prefix + uri[len(prefix):]
+    return uri
+
+
+def create_pooled_engine(uri: str, pool_size: int = 5, max_overflow: int = 5) -> AsyncEngine:
+    uri = to_async_uri(uri)
+    if uri.startswith("sqlite"):
+        # SQLite picks its own pool class; sizing options do not apply
+        return create_async_engine(uri)
+    return create_async_engine(uri, pool_size=pool_size, max_overflow=max_overflow, pool_pre_ping=True)
+
+
+# ========= Latency metrics =========
+class LatencyMetrics:
+    """Per-route request counts and latency percentiles over a sliding window of recent requests."""
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.window))
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, elapsed_ms: float) -> None:
+        self.samples[route].append(elapsed_ms)
+        self.counts[route] += 1
+
+    @staticmethod
+    def percentile(sorted_values: List[float], pct: float) -> float:
+        # nearest-rank percentile
+        if not sorted_values:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+        return sorted_values[min(rank, len(sorted_values)) - 1]
+
+    def snapshot(self) -> Dict[str, dict]:
+        report = {}
+        for route, samples in self.samples.items():
+            values = sorted(samples)
+            report[route] = {
+                "count": self.counts[route],
+                "p50_ms": round(self.percentile(values, 50), 3),
+                "p99_ms": round(self.percentile(values, 99), 3),
+                "max_ms": round(values[-1], 3) if values else 0.0,
+            }
+        return report
+
+
+# ========= In-memory cache of hot aggregates =========
+class AggregateCache:
+    """
+    Wage stats and top skills held in memory, rebuilt whenever a new dataset version is published.
+
+    Lookups read plain dicts; a refresh builds new dicts and swaps them in, so readers never see
+    a half-built cache.
+    """
+
+    WAGE_FIELDS = [
+        "tot_emp", "a_mean", "a_median", "a_pct10", "a_pct25", "a_pct75", "a_pct90",
+        "h_mean", "h_median", "h_pct10", "h_pct25", "h_pct75", "h_pct90",
+    ]
+
+    def __init__(self, schema: Optional[str] = "curated"):
+        self.prefix = f"{schema}." if schema else ""
+        self.version: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+        self.wages: Dict[str, Dict[str, dict]] = {}          # occ_code -> prim_state -> stats
+        self.skills: Dict[str, List[Tuple[str, float]]] = {}  # soc code (O*NET or 6-digit) -> [(skill, importance)]
+
+    async def fetch_version(self, engine: AsyncEngine) -> Optional[int]:
+        try:
+            async with engine.connect() as conn:
+                result = await conn.execute(text(f"SELECT max(version) FROM {self.prefix}dataset_version"))
+                return result.scalar()
+        except DBAPIError as exc:
+            # No version table yet (loaders never published); treat as unversioned data.
+            # Anything else (auth, connection, pool errors) is raised so the caller reports it.
+            if _is_undefined_table(exc):
+                return None
+            raise
+
+    async def refresh(self, engine: AsyncEngine, version: Optional[int] = None) -> None:
+        wage_sql = (
+            f"SELECT occ_code, occ_title, prim_state, {', '.join(self.WAGE_FIELDS)} "
+            f"FROM {self.prefix}oews_cleaned"
+        )
+        skills_sql = (
+            "SELECT onet_soc_code, element_name, data_value "
+            f"FROM {self.prefix}onet_skills_cleaned WHERE scale_id = 'im'"
+        )
+        async with engine.connect() as conn:
+            wage_rows = (await conn.execute(text(wage_sql))).all()
+            skill_rows = (await conn.execute(text(skills_sql))).all()
+
+        # Building the dicts is CPU-bound (tens of thousands of rows); do it off the event loop
+        # so in-flight requests are not stalled, then swap the new dicts in.
+        wages, skills = await asyncio.to_thread(self._build_aggregates, wage_rows, skill_rows)
+        previous = [self.wages, self.skills]
+        self.wages, self.skills = wages, skills
+        self.version, self.loaded_at = version, time.time()
+
+        # Freeing the previous cache (~100k objects) is also done off the loop
+        await asyncio.to_thread(previous.clear)
+
+    @classmethod
+    def _build_aggregates(
+        cls,
+        wage_rows: Sequence,
+        skill_rows: Sequence
+    ) -> Tuple[Dict[str, Dict[str, dict]], Dict[str, List[Tuple[str, float]]]]:
+        # rows are unpacked by position (same order as the SELECT); much cheaper than name lookups
+        wages: Dict[str, Dict[str, dict]] = defaultdict(dict)
+        for occ_code, occ_title, prim_state, *values in wage_rows:
+            stats = dict(zip(cls.WAGE_FIELDS, map(_to_float, values)))
+            stats["occ_title"] = occ_title
+            wages[occ_code][prim_state] = stats
+
+        # O*NET child codes keep their own list; the 6-digit parent averages its children per skill
+        per_code: Dict[str, Dict[str, float]] = defaultdict(dict)
+        per_parent: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+        for onet_soc_code, element_name, data_value in skill_rows:
+            value = _to_float(data_value)
+            if value is None:
+                continue
+            per_code[onet_soc_code][element_name] = value
+            per_parent[onet_soc_code.split(".")[0]][element_name].append(value)
+
+        skills: Dict[str, List[Tuple[str, float]]] = {}
+        for code, values in per_code.items():
+            skills[code] = sorted(values.items(), key=lambda kv: (-kv[1], kv[0]))
+        for parent, values in per_parent.items():
+            averaged = {name: sum(v) / len(v) for name, v in values.items()}
+            skills.setdefault(parent, sorted(averaged.items(), key=lambda kv: (-kv[1], kv[0])))
+
+        return dict(wages), skills
+
+    # ----- lookups -----
+    def wage_stats(self, soc: str, state: Optional[str] = None) -> Optional[dict]:
+        by_state = self.wages.get(soc)
+        if by_state is None:
+            return None
+        if state is None:
+            return by_state
+        return {state: by_state[state]} if state in by_state else None
+
+    def top_skills(self, soc: str, top: int = 10) -> Optional[List[dict]]:
+        ranked = self.skills.get(soc)
+        if ranked is None:
+            return None
+        return [{"skill": name, "importance": round(value, 3)} for name, value in ranked[:top]]
+
+
+# ----- This function recognizes "table does not exist" errors (Postgres SQLSTATE 42P01, SQLite "no such table") -----
+def _is_undefined_table(exc: DBAPIError) -> bool:
+    orig = exc.orig
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return sqlstate == "42P01" or "no such table" in str(orig).lower()
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if result != result else result  # NaN -> None (JSON null)
+
+
+# ========= HTTP service =========
+class QueryService:
+    """
+    Minimal asyncio HTTP/1.1 server answering from the in-memory cache.
+
+    Parameters
+    ----------
+    db_uri : str
+        Database URI (sync or async form; converted to the async driver).
+    schema : str, optional
+        Schema of the curated tables. None for engines without schemas (embedded stand-in).
+    refresh_interval : float
+        Seconds between checks for a newly published dataset version.
+    idle_timeout : float
+        Seconds a connection may wait for the next request line or header before it is closed.
+    """
+
+    def __init__(
+        self,
+        db_uri: str,
+        schema: Optional[str] = "curated",
+        refresh_interval: float = 30.0,
+        pool_size: int = 5,
+        idle_timeout: float = 15.0
+    ):
+        self.engine = create_pooled_engine(db_uri, pool_size=pool_size)
+        self.cache = AggregateCache(schema=schema)
+        self.metrics = LatencyMetrics()
+        self.refresh_interval = refresh_interval
+        self.idle_timeout = idle_timeout
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    # ----- lifecycle -----
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        await self.cache.refresh(self.engine, await self.cache.fetch_version(self.engine))
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.engine.dispose()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                version = await self.cache.fetch_version(self.engine)
+                if version is not None and version != self.cache.version:
+                    await self.cache.refresh(self.engine, version)
+                    print(f"✅ Cache refreshed to dataset version {version}")
+            except Exception as exc:  # keep serving the current cache if a refresh fails
+                print(f"⚠️ Warning: cache refresh failed: {exc!r}")
+
+    # ----- request handling -----
+    def route(self, method: str, target: str) -> Tuple[str, int, dict]:
+        """Return (route name, HTTP status, JSON body) for a request. Pure lookup; no I/O."""
+        parts = urlsplit(target)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        path = parts.path.rstrip("/") or "/"
+
+        if method != "GET":
+            return "unsupported", 405, {"error": "only GET is supported"}
+
+        if path == "/health":
+            return path, 200, {"status": "ok", "version": self.cache.version}
+
+        if path == "/metrics":
+            return path, 200, {"version": self.cache.version, "routes": self.metrics.snapshot()}
+
+        if path == "/wages":
+            soc = query.get("soc", "").strip().lower()
+            state = query.get("state", "").strip().lower() or None
+            if not soc:
+                return path, 400, {"error": "missing required parameter 'soc'"}
+            stats = self.cache.wage_stats(soc, state)
+            if stats is None:
+                return path, 404, {"error": f"no wage stats for soc '{soc}'" + (f" in state '{state}'" if state else "")}
+            return path, 200, {"soc": soc, "version": self.cache.version, "states": stats}
+
+        if path == "/skills":
+            soc = query.get("soc", "").strip().lower()
+            if not soc:
+                return path, 400, {"error": "missing required parameter 'soc'"}
+            try:
+                top = max(1, int(query.get("top", 10)))
+            except ValueError:
+                return path, 400, {"error": "'top' must be an integer"}
+            skills = self.cache.top_skills(soc, top)
+            if skills is None:
+                return path, 404, {"error": f"no skills for soc '{soc}'"}
+            return path, 200, {"soc": soc, "version": self.cache.version, "skills": skills}
+
+        # unknown paths share one metrics bucket so arbitrary URLs cannot grow the metrics table
+        return "unknown", 404, {"error": f"unknown path '{path}'"}
+
+    @staticmethod
+    async def _write_response(writer: asyncio.StreamWriter, status: int, body: dict, keep_alive: bool) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+            + payload
+        )
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # every read has a timeout, so idle keep-alive clients cannot hold a task and socket forever
+        async def readline() -> bytes:
+            return await asyncio.wait_for(reader.readline(), self.idle_timeout)
+
+        try:
+            while True:
+                request_line = await readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+
+                # HTTP/1.1 connections persist by default; HTTP/1.0 ones only with 'Connection: keep-alive'
+                parts = request_line.decode("latin-1").split()
+                http_version = parts[2].upper() if len(parts) == 3 else ""
+                keep_alive = http_version == "HTTP/1.1"
+
+                # read headers; the service is read-only, so request bodies are ignored
+                while True:
+                    header = await readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "connection":
+                        tokens = {token.strip().lower() for token in value.split(",")}
+                        if "close" in tokens:
+                            keep_alive = False
+                        elif "keep-alive" in tokens:
+                            keep_alive = True
+
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                    route, status, body = self.route(method, target)
+                except ValueError:
+                    route, status, body = "invalid", 400, {"error": "malformed request line"}
+                    keep_alive = False
+
+                await self._write_response(writer, status, body, keep_alive)
+                self.metrics.record(route, (time.perf_counter() - start) * 1000)
+
+                if not keep_alive:
+                    break
+        except ValueError:
+            # StreamReader.readline raises ValueError when a line exceeds the 64 KiB buffer limit
+            try:
+                await self._write_response(writer, 400, {"error": "request line or header too long"}, False)
+                self.metrics.record("invalid", 0.0)
+            except ConnectionError:
+                pass
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+# ========= Run the service =========
+async def serve(db_uri: str, host: str, port: int, refresh_interval: float) -> None:
+    service = QueryService(db_uri, refresh_interval=refresh_interval)
+    server = await service.start(host, port)
+    print(f"Serving curated aggregates (version {service.cache.version}) on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    # --- Get Postgres connection URI from environment variable ---
+    PG_URI = os.getenv("PG_URI")
+    if not PG_URI:
+        raise ValueError("Environment variable 'PG_URI' is not set.")
+
+    asyncio.run(serve(
+        PG_URI,
+        host=os.getenv("QUERY_SERVICE_HOST", "127.0.0.1"),
+        port=int(os.getenv("QUERY_SERVICE_PORT", "8080")),
+        refresh_interval=float(os.getenv("QUERY_SERVICE_REFRESH_SECONDS", "30")),
+    ))